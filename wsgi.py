@@ -0,0 +1,13 @@
+"""
+WSGI entry point for production servers.
+
+Run with one worker per core so concurrent OCR requests can use every
+core (Tesseract itself is kept single-threaded via OMP_THREAD_LIMIT=1):
+
+    gunicorn -w $(nproc) -k gthread --threads 2 wsgi:app
+"""
+
+from app import app
+
+if __name__ == '__main__':
+    app.run()